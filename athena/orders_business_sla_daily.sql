@@ -0,0 +1,18 @@
+CREATE OR REPLACE VIEW "orders_business_sla_daily" AS 
+WITH
+  base AS (
+   SELECT
+     TRY(date_parse(NULLIF(trim(BOTH FROM order_delivered_customer_date), ''), '%Y-%m-%d %H:%i:%s')) delivered_ts
+   , TRY(date_parse(NULLIF(trim(BOTH FROM order_estimated_delivery_date), ''), '%Y-%m-%d %H:%i:%s')) estimated_ts
+   FROM
+     olist_orders
+   WHERE (order_status = 'delivered')
+) 
+SELECT
+  date(delivered_ts) delivered_day
+, COUNT(*) total_delivered
+, SUM((CASE WHEN (delivered_ts > estimated_ts) THEN 1 ELSE 0 END)) late_orders
+FROM
+  base
+WHERE ((delivered_ts IS NOT NULL) AND (estimated_ts IS NOT NULL))
+GROUP BY 1
@@ -0,0 +1,49 @@
+CREATE EXTERNAL TABLE IF NOT EXISTS sla_results (
+  check_time_utc string,
+  check_time_et string,
+  expected_by_utc string,
+  expected_by_et string,
+  latest_object_time_utc string,
+  latest_object_time_et string,
+  latest_object_key string,
+  status string,
+  delay_minutes int,
+  arrival_delay_minutes int,
+  latest_data_time_utc string,
+  data_lag_minutes int,
+  freshness_score int,
+  partition_bytes bigint,
+  partition_objects int,
+  volume_status string,
+  new_objects int,
+  written_to string
+)
+PARTITIONED BY (
+  source string,
+  year string,
+  month string,
+  day string,
+  hour string
+)
+ROW FORMAT SERDE 'org.openx.data.jsonserde.JsonSerDe'
+LOCATION 's3://de-sla-results-sirisha-01/metrics/'
+-- Athena only sees sources listed in projection.source.values. When the checker
+-- runs with other sources (SLA_CONFIG_PATH, e.g. synthetic_0000...), add them:
+--   ALTER TABLE sla_results SET TBLPROPERTIES ('projection.source.values' = 'orders,payments,products,...');
+TBLPROPERTIES (
+  'projection.enabled' = 'true',
+  'projection.source.type' = 'enum',
+  'projection.source.values' = 'orders,payments,products',
+  'projection.year.type' = 'integer',
+  'projection.year.range' = '2024,2040',
+  'projection.month.type' = 'integer',
+  'projection.month.range' = '1,12',
+  'projection.month.digits' = '2',
+  'projection.day.type' = 'integer',
+  'projection.day.range' = '1,31',
+  'projection.day.digits' = '2',
+  'projection.hour.type' = 'integer',
+  'projection.hour.range' = '0,23',
+  'projection.hour.digits' = '2',
+  'storage.location.template' = 's3://de-sla-results-sirisha-01/metrics/source=${source}/year=${year}/month=${month}/day=${day}/hour=${hour}/'
+);
@@ -0,0 +1,49 @@
+import gzip
+import json
+from pathlib import Path
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+RAW_DIR = PROJECT_ROOT / "data" / "raw"
+
+ORDERS_FEEDS = RAW_DIR / "feeds" / "orders"
+
+OUT_FILE = PROJECT_ROOT / "data" / "sketches" / "lateness_daily.json.gz"  # upload to S3 under sketches/
+
+TS_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def load_delivered_orders():
+    cols = ["order_status", "order_delivered_customer_date", "order_estimated_delivery_date"]
+    files = sorted(ORDERS_FEEDS.glob("*/*.csv"))
+    df = pd.concat([pd.read_csv(f, usecols=cols, dtype=str) for f in files], ignore_index=True)
+
+    df = df[df["order_status"] == "delivered"]
+    df["delivered_ts"] = pd.to_datetime(df["order_delivered_customer_date"], format=TS_FORMAT, errors="coerce")
+    df["estimated_ts"] = pd.to_datetime(df["order_estimated_delivery_date"], format=TS_FORMAT, errors="coerce")
+    return df.dropna(subset=["delivered_ts", "estimated_ts"])
+
+
+def build_daily_sketches(df):
+    # late orders only, as in avg_days_late (CASE WHEN delivered_ts > estimated_ts)
+    df = df[df["delivered_ts"] > df["estimated_ts"]]
+    # date_diff('day', estimated, delivered): whole days, truncated toward zero
+    df = df.assign(
+        delivered_day=df["delivered_ts"].dt.strftime("%Y-%m-%d"),
+        days_late=((df["delivered_ts"] - df["estimated_ts"]) / pd.Timedelta(days=1)).astype(int),
+    )
+    counts = df.groupby(["delivered_day", "days_late"]).size()
+
+    # one sparse histogram per delivered day
+    days = {}
+    for (day, days_late), n in counts.items():
+        days.setdefault(day, {})[str(days_late)] = int(n)
+    return {"unit": "day", "orders": "late", "days": days}
+
+
+if __name__ == "__main__":
+    sketches = build_daily_sketches(load_delivered_orders())
+    OUT_FILE.parent.mkdir(parents=True, exist_ok=True)
+    OUT_FILE.write_bytes(gzip.compress(json.dumps(sketches, separators=(",", ":")).encode()))
+    print(f"[OK] {len(sketches['days'])} daily lateness sketches saved at: {OUT_FILE}")
+    print("\nDone ✅ Upload data/sketches/lateness_daily.json.gz to the results bucket under sketches/")
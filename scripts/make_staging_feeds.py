@@ -1,6 +1,13 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
 from pathlib import Path
+import numpy as np
 import pandas as pd
 from datetime import datetime, timezone, timedelta
+from zoneinfo import ZoneInfo
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 RAW_DIR = PROJECT_ROOT / "data" / "raw"
@@ -10,6 +17,31 @@ PAYMENTS_IN = RAW_DIR / "payments" / "olist_order_payments_dataset.csv"
 PRODUCTS_IN = RAW_DIR / "products" / "olist_products_dataset.csv"
 
 OUT_BASE = RAW_DIR / "staging_feeds"  # upload this to S3 under staging/
+SYNTHETIC_OUT = RAW_DIR / "synthetic_feeds"  # local S3 stand-in for load tests
+
+ET = ZoneInfo("America/New_York")
+CHUNK_ROWS = 50_000
+FLUSH_ROWS = 200_000  # buffered synthetic rows before partition files are appended to
+HASH_KEYS = ("sla-synthetic-01", "sla-synthetic-02")  # 16-char pandas hash keys
+
+# SLA rules written for synthetic sources (same shape as the checker's SLA dict)
+SYNTHETIC_SLA = {
+    "hourly": {
+        "type": "hourly",
+        "expected_within_min": 15,
+        "late_threshold_min": 30,
+        "critical_threshold_min": 120,
+        "required": True
+    },
+    "daily": {
+        "type": "daily",
+        "expected_hour_local": 9,
+        "expected_minute_local": 0,
+        "late_threshold_min": 60,
+        "critical_threshold_min": 240,
+        "required": True
+    }
+}
 
 
 def ensure_dir(p: Path) -> None:
@@ -90,9 +122,234 @@ def make_products_snapshot():
     print(f"[OK] Products snapshot created at: {out_file}")
 
 
+# ---------------- SYNTHETIC LOAD-TEST FEEDS ----------------
+
+def stable_fraction(*parts):
+    # deterministic value in [0, 1) for a (seed, source, partition) tuple
+    h = hashlib.md5(":".join(str(p) for p in parts).encode()).hexdigest()
+    return int(h[:8], 16) / 0x100000000
+
+
+def hash_ids(values, replica):
+    # two stable 64-bit hashes per id, salted with the replica, for a whole column at once
+    salted = (values.astype(str) + f":{replica}").to_numpy()
+    return np.stack([pd.util.hash_array(salted, hash_key=k) for k in HASH_KEYS], axis=1)
+
+
+def hex_ids(hashes):
+    # 2 x uint64 per row -> 32-hex ids, the same shape as the Olist ids
+    hex_str = hashes.astype(">u8").tobytes().hex()
+    return np.frombuffer(hex_str.encode(), dtype="S32").astype(str)
+
+
+def iter_order_chunks(path):
+    # small per-day feed files are batched up to CHUNK_ROWS rows per chunk
+    files = sorted(path.glob("**/*.csv")) if path.is_dir() else [path]
+    pending, n = [], 0
+    for f in files:
+        for part in pd.read_csv(f, dtype=str, chunksize=CHUNK_ROWS):
+            pending.append(part)
+            n += len(part)
+            if n >= CHUNK_ROWS:
+                yield pd.concat(pending, ignore_index=True)
+                pending, n = [], 0
+    if pending:
+        yield pd.concat(pending, ignore_index=True)
+
+
+def expected_arrival(cadence, feed_date, hour):
+    # when a partition is due under SYNTHETIC_SLA: hourly at HH:15 UTC, daily at 09:00 ET
+    cfg = SYNTHETIC_SLA[cadence]
+    if cadence == "hourly":
+        start = datetime.combine(feed_date, datetime.min.time(), timezone.utc) + timedelta(hours=hour)
+        return start + timedelta(minutes=cfg["expected_within_min"])
+    local = datetime.combine(feed_date, datetime.min.time(), ET).replace(
+        hour=cfg["expected_hour_local"], minute=cfg["expected_minute_local"]
+    )
+    return local.astimezone(timezone.utc)
+
+
+def partition_files(out_base, sources, days, today, now, seed, missing_rate):
+    """
+    Output file for every (source, day-of-window, hour), flattened to
+    code = (source index * days + day) * 24 + hour.
+
+    Returns (paths, file index per code); the index is -1 for partitions
+    that are not due yet or are dropped (missing_rate).
+    """
+    paths, index, file_ids = [], [], {}
+    for source, cadence in sources.items():
+        for d in range(days):
+            feed_date = today - timedelta(days=days - 1 - d)
+            date_str = feed_date.isoformat()
+            for h in range(24):
+                if (expected_arrival(cadence, feed_date, h) > now
+                        or stable_fraction(seed, source, feed_date, h if cadence == "hourly" else "") < missing_rate):
+                    index.append(-1)
+                    continue
+                if cadence == "hourly":
+                    path = out_base / source / date_str / f"hour={h:02d}" / f"{source}_{date_str}_h{h:02d}.csv"
+                else:
+                    path = out_base / source / date_str / f"{source}_{date_str}.csv"
+                if path not in file_ids:
+                    file_ids[path] = len(paths)
+                    paths.append(path)
+                index.append(file_ids[path])
+    return paths, np.array(index, dtype=np.int64)
+
+
+def flush_partitions(frames, paths, written):
+    # append buffered rows to their partition files: the whole buffer is
+    # rendered to CSV once, then each file gets one open + write per flush
+    if not frames:
+        return 0
+    df = pd.concat(frames, ignore_index=True).sort_values("_file", kind="stable")
+    file_ids = df["_file"].to_numpy()
+    data = df.drop(columns="_file")
+    lines = data.to_csv(index=False, header=False, lineterminator="\n").splitlines(keepends=True)
+    if len(lines) != len(data):
+        raise ValueError("multi-line CSV fields are not supported in synthetic feeds")
+    header = ",".join(data.columns) + "\n"
+
+    bounds = np.flatnonzero(np.diff(file_ids)) + 1
+    for start, end in zip(np.r_[0, bounds], np.r_[bounds, len(lines)]):
+        path = paths[file_ids[start]]
+        is_new = path not in written
+        if is_new:
+            ensure_dir(path.parent)
+        with open(path, "a") as f:
+            if is_new:
+                f.write(header)
+            f.writelines(lines[start:end])
+        written.add(path)
+    return len(df)
+
+
+def make_synthetic_feeds(orders_in, out_base, scale, n_sources, cadences, days,
+                         late_rate, missing_rate, seed, force=False):
+    """
+    Replay orders `scale` times across `n_sources` synthetic sources.
+
+    Orders are read in CHUNK_ROWS chunks; replica ids and partitions are
+    computed per column, and rows are buffered and appended to their
+    partition files every FLUSH_ROWS rows, so memory stays bounded and each
+    file is opened once per flush whatever the scale.
+    Each (source, partition) is deterministically dropped (missing_rate) or
+    stamped late (late_rate) from `seed`; file mtimes carry the arrival time,
+    which is what the checker's local storage backend reads.
+
+    Partition files are appended to, so out_base must start empty: a
+    non-empty out_base is refused, or wiped first with force=True.
+    """
+    if out_base.is_dir() and any(out_base.iterdir()):
+        if not force:
+            raise SystemExit(f"[ERROR] {out_base} is not empty; pass --force to replace it")
+        shutil.rmtree(out_base)
+
+    now = datetime.now(timezone.utc)
+    today = now.date()
+    sources = {f"synthetic_{i:04d}": cadences[i % len(cadences)] for i in range(n_sources)}
+
+    ensure_dir(out_base)
+    paths, file_index = partition_files(out_base, sources, days, today, now, seed, missing_rate)
+
+    rows = 0
+    buffer, buffered, written = [], 0, set()
+    for chunk in iter_order_chunks(orders_in):
+        ts = pd.to_datetime(chunk["order_purchase_timestamp"], errors="coerce", utc=True)
+        chunk = chunk[ts.notna()]
+        ts = ts[ts.notna()]
+
+        # keep the daily/hourly shape: original day-of-window and hour
+        day_idx = ((ts.dt.tz_localize(None).dt.normalize() - pd.Timestamp(0)).dt.days % days).to_numpy()
+        hour = ts.dt.hour.to_numpy()
+
+        for replica in range(scale):
+            order_hash = hash_ids(chunk["order_id"], replica)
+            part = chunk
+            if replica:  # replica 0 keeps the original ids
+                part = chunk.assign(
+                    order_id=hex_ids(order_hash),
+                    customer_id=hex_ids(hash_ids(chunk["customer_id"], replica)),
+                )
+
+            src = (order_hash[:, 0] % n_sources).astype(np.int64)
+            file_id = file_index[(src * days + day_idx) * 24 + hour]
+            keep = file_id >= 0
+            buffer.append(part[keep].assign(_file=file_id[keep]))
+            buffered += int(keep.sum())
+
+            if buffered >= FLUSH_ROWS:
+                rows += flush_partitions(buffer, paths, written)
+                buffer, buffered = [], 0
+
+    rows += flush_partitions(buffer, paths, written)
+
+    stamp_arrival_times(out_base, sources, late_rate, seed, now)
+
+    with open(out_base / "sla_rules.json", "w") as f:
+        json.dump({src: SYNTHETIC_SLA[cadence] for src, cadence in sources.items()}, f, indent=2)
+
+    print(f"[OK] {rows} rows across {n_sources} synthetic sources written to: {out_base}")
+
+
+def stamp_arrival_times(out_base, sources, late_rate, seed, now):
+    # set each file's mtime to its arrival time (+ injected lateness), walking one directory at a time
+    for source, cadence in sources.items():
+        src_dir = out_base / source
+        if not src_dir.is_dir():
+            continue
+        for day_entry in os.scandir(src_dir):
+            feed_date = datetime.strptime(day_entry.name, "%Y-%m-%d").date()
+            if cadence == "hourly":
+                parts = [(int(h.name[5:]), h.path) for h in os.scandir(day_entry.path)]
+            else:
+                parts = [(0, day_entry.path)]
+
+            for h, part_dir in parts:
+                key = h if cadence == "hourly" else ""
+                arrival = expected_arrival(cadence, feed_date, h)
+                arrival += timedelta(minutes=int(10 * stable_fraction(seed, "jitter", source, feed_date, key)))
+                if stable_fraction(seed, "late", source, feed_date, key) < late_rate:
+                    arrival += timedelta(minutes=30 + int(600 * stable_fraction(seed, "delay", source, feed_date, key)))
+                for f in os.scandir(part_dir):
+                    if not f.is_file():
+                        continue
+                    if arrival > now:
+                        os.remove(f.path)  # late partition that has not landed yet
+                    else:
+                        os.utime(f.path, (arrival.timestamp(), arrival.timestamp()))
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Build staging feeds, or synthetic load-test feeds with --synthetic.")
+    p.add_argument("--synthetic", action="store_true", help="generate scaled synthetic sources instead of the staging replay")
+    p.add_argument("--orders", type=Path, default=RAW_DIR / "feeds" / "orders", help="orders CSV file or directory of CSVs")
+    p.add_argument("--out", type=Path, default=SYNTHETIC_OUT)
+    p.add_argument("--force", action="store_true", help="delete a non-empty --out directory before generating")
+    p.add_argument("--scale", type=int, default=1, help="replicate every order this many times")
+    p.add_argument("--sources", type=int, default=10)
+    p.add_argument("--cadence", default="hourly,daily", help="comma-separated cadences, cycled over sources")
+    p.add_argument("--days", type=int, default=7, help="days of partitions per source, ending today")
+    p.add_argument("--late-rate", type=float, default=0.05)
+    p.add_argument("--missing-rate", type=float, default=0.01)
+    p.add_argument("--seed", type=int, default=42)
+    return p.parse_args()
+
+
 if __name__ == "__main__":
-    ensure_dir(OUT_BASE)
-    make_orders_last_7_days()
-    make_payments_last_24_hours()
-    make_products_snapshot()
-    print("\nDone ✅ Upload data/raw/staging_feeds/ to S3 under staging/")
+    args = parse_args()
+
+    if args.synthetic:
+        make_synthetic_feeds(
+            args.orders, args.out, args.scale, args.sources, args.cadence.split(","),
+            args.days, args.late_rate, args.missing_rate, args.seed, args.force
+        )
+        print(f"\nDone ✅ Check with: STORAGE_BACKEND=local LOCAL_RAW_ROOT={args.out.parent} "
+              f"RAW_PREFIX={args.out.name} SLA_CONFIG_PATH={args.out / 'sla_rules.json'}")
+    else:
+        ensure_dir(OUT_BASE)
+        make_orders_last_7_days()
+        make_payments_last_24_hours()
+        make_products_snapshot()
+        print("\nDone ✅ Upload data/raw/staging_feeds/ to S3 under staging/")
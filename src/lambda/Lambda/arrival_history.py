@@ -0,0 +1,96 @@
+"""
+Per-source arrival log written by the freshness checker.
+
+Each checker run that sees new keys appends one segment:
+
+    arrivals/source=<source>/<check time %Y%m%dT%H%M%SZ>.json.gz
+
+A segment is gzipped JSON stored column by column:
+
+    {"key": [...], "last_modified": [epoch seconds, ...],
+     "size": [...], "delay_min": [minutes past expected, or null, ...]}
+
+Segments are never rewritten. Every arrival in a segment landed before
+the segment's check time, so readers skip segments named before the
+period start.
+
+`store` is any checker storage backend (S3Storage / LocalStorage).
+"""
+import gzip
+import json
+from datetime import datetime, timezone
+
+ARRIVALS_PREFIX = "arrivals"
+SEGMENT_TIME_FORMAT = "%Y%m%dT%H%M%SZ"
+
+
+def segment_prefix(source: str) -> str:
+    return f"{ARRIVALS_PREFIX}/source={source}/"
+
+
+def append_arrivals(store, source: str, check_time_utc: datetime, arrivals: list[dict]) -> str | None:
+    """Write one segment for `arrivals` (dicts with Key/LastModified/Size/delay_min)."""
+    if not arrivals:
+        return None
+
+    columns = {
+        "key": [a["Key"] for a in arrivals],
+        "last_modified": [int(a["LastModified"].timestamp()) for a in arrivals],
+        "size": [a.get("Size", 0) for a in arrivals],
+        "delay_min": [a.get("delay_min") for a in arrivals],
+    }
+    key = f"{segment_prefix(source)}{check_time_utc:{SEGMENT_TIME_FORMAT}}.json.gz"
+    store.put_bytes(key, gzip.compress(json.dumps(columns, separators=(",", ":")).encode()))
+    return key
+
+
+def _iter_segments(store, source: str, since: datetime | None):
+    """Decoded segments of `source` written by checks at or after `since`."""
+    prefix = segment_prefix(source)
+    # segment names are UTC check times; the bare timestamp sorts just before
+    # a segment written at exactly `since`, so listing starts after it
+    first_segment = f"{prefix}{since.astimezone(timezone.utc):{SEGMENT_TIME_FORMAT}}" if since else None
+    for obj in store.iter_objects(prefix, start_after=first_segment):
+        yield json.loads(gzip.decompress(store.get_bytes(obj["Key"])))
+
+
+def logged_since(store, source: str, since: datetime) -> set[tuple[str, int]]:
+    """(key, last_modified) of every arrival logged by checks since `since`."""
+    logged = set()
+    for cols in _iter_segments(store, source, since):
+        logged.update(zip(cols["key"], cols["last_modified"]))
+    return logged
+
+
+def read_arrivals(store, source: str, start: datetime | None = None, end: datetime | None = None) -> list[dict]:
+    """Arrivals of `source` whose LastModified falls in [start, end]."""
+    lo = start.timestamp() if start else float("-inf")
+    hi = end.timestamp() if end else float("inf")
+
+    out = []
+    for cols in _iter_segments(store, source, start):
+        for key, ts, size, delay in zip(cols["key"], cols["last_modified"], cols["size"], cols["delay_min"]):
+            if lo <= ts <= hi:
+                out.append({
+                    "key": key,
+                    "last_modified": datetime.fromtimestamp(ts, timezone.utc),
+                    "size": size,
+                    "delay_min": delay,
+                })
+    return out
+
+
+def arrival_delay_histogram(store, source: str, start: datetime | None = None,
+                            end: datetime | None = None, bucket_min: int = 15) -> dict[int, int]:
+    """
+    {bucket start (minutes past expected): arrivals} for `source` over
+    [start, end]. Negative buckets are early arrivals; keys with no
+    expected time (e.g. snapshots) are left out.
+    """
+    hist = {}
+    for a in read_arrivals(store, source, start, end):
+        if a["delay_min"] is None:
+            continue
+        b = a["delay_min"] // bucket_min * bucket_min
+        hist[b] = hist.get(b, 0) + 1
+    return dict(sorted(hist.items()))
@@ -0,0 +1,66 @@
+"""
+Mergeable delivery-lateness sketches.
+
+Lateness is date_diff('day', estimated_ts, delivered_ts) over late orders
+(delivered_ts > estimated_ts), the same measure and population as
+avg_days_late, so it is never negative. It only takes a few hundred
+integer values, so each day's sketch is an exact sparse histogram
+{days: count}. Merging is adding counts, and quantiles are exact.
+
+Stored format (gzipped JSON, built by scripts/build_lateness_sketches.py):
+
+    {"unit": "day", "orders": "late", "days": {"2018-08-01": {"0": 4, "1": 2, ...}, ...}}
+
+Files without "orders" also hold early orders; for those only buckets > 0
+are used, which leaves out orders late by less than a day.
+"""
+import math
+from datetime import date
+
+
+def merge_sketches(sketches) -> dict[int, int]:
+    merged = {}
+    for sketch in sketches:
+        for bucket, count in sketch.items():
+            b = int(bucket)
+            merged[b] = merged.get(b, 0) + count
+    return merged
+
+
+def quantiles(hist: dict[int, int], qs) -> list:
+    """Nearest-rank quantiles of a merged histogram (None if empty)."""
+    total = sum(hist.values())
+    if total == 0:
+        return [None for _ in qs]
+
+    buckets = sorted(hist)
+    out = []
+    for q in qs:
+        rank = max(1, math.ceil(q * total))
+        seen = 0
+        for b in buckets:
+            seen += hist[b]
+            if seen >= rank:
+                out.append(b)
+                break
+    return out
+
+
+def lateness_percentiles(store: dict, start: date | None = None, end: date | None = None) -> dict:
+    """p50/p90/p99 days late of the late orders delivered in [start, end]."""
+    days = store.get("days", {})
+    selected = [
+        sketch for day, sketch in days.items()
+        if (start is None or day >= start.isoformat()) and (end is None or day <= end.isoformat())
+    ]
+    hist = merge_sketches(selected)
+    if store.get("orders") != "late":
+        hist = {b: n for b, n in hist.items() if b > 0}
+    p50, p90, p99 = quantiles(hist, (0.5, 0.9, 0.99))
+
+    return {
+        "late_orders": sum(hist.values()),
+        "p50_days_late": p50,
+        "p90_days_late": p90,
+        "p99_days_late": p99,
+    }
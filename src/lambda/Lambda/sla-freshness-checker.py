@@ -1,19 +1,45 @@
+import csv
 import json
 import os
+import re
 import boto3
+from botocore.exceptions import ClientError
 from datetime import datetime, timezone, timedelta
 from zoneinfo import ZoneInfo
 
-# AWS clients
-s3 = boto3.client("s3")
-sns = boto3.client("sns")
+from arrival_history import append_arrivals, logged_since
 
 # Buckets
 RAW_BUCKET = "de-sla-raw-sirisha-01"
 RESULTS_BUCKET = "de-sla-results-sirisha-01"
+RAW_PREFIX = os.environ.get("RAW_PREFIX", "staging")
+
+# Storage backend: "s3" (default) or "local" for running against a local tree
+STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "s3")
+LOCAL_RAW_ROOT = os.environ.get("LOCAL_RAW_ROOT", "data/raw")
+LOCAL_RESULTS_ROOT = os.environ.get("LOCAL_RESULTS_ROOT", "data/results")
 
 # SNS
 SNS_TOPIC_ARN = os.environ.get("SNS_TOPIC_ARN", "")
+sns = boto3.client("sns") if SNS_TOPIC_ARN else None
+
+# Content freshness probe (ranged read of the newest object)
+CONTENT_PROBE_ENABLED = os.environ.get("CONTENT_PROBE_ENABLED", "false").lower() == "true"
+CONTENT_PROBE_HEAD_BYTES = 4096
+CONTENT_PROBE_TAIL_BYTES = int(os.environ.get("CONTENT_PROBE_TAIL_BYTES", "65536"))
+CONTENT_STATE_KEY = "state/content_probe.json"  # newest probed ETag per source
+
+# Incremental listing: resume from a StartAfter cursor and log new arrivals
+INCREMENTAL_LISTING = os.environ.get("INCREMENTAL_LISTING", "false").lower() == "true"
+CURSOR_STATE_KEY = "state/listing_cursors.json"
+# Full listing this often, to pick up keys rewritten in older partitions
+FULL_RELIST_HOURS = int(os.environ.get("FULL_RELIST_HOURS", "24"))
+
+# Volume anomaly detection (rolling baseline per source + hour-of-day)
+VOLUME_STATE_KEY = "state/volume_baseline.json"
+VOLUME_MIN_SAMPLES = 5
+VOLUME_WINDOW = 30  # partitions; older ones decay exponentially
+VOLUME_Z_THRESHOLD = 3.0
 
 # Timezone
 ET = ZoneInfo("America/New_York")
@@ -26,14 +52,16 @@ SLA = {
         "expected_minute_local": 0,
         "late_threshold_min": 60,
         "critical_threshold_min": 240,
-        "required": True
+        "required": True,
+        "content_ts_column": "order_purchase_timestamp"
     },
     "payments": {
         "type": "hourly",
         "expected_within_min": 15,
         "late_threshold_min": 30,
         "critical_threshold_min": 120,
-        "required": True
+        "required": True,
+        "content_ts_column": "order_purchase_timestamp"
     },
     "products": {
         "type": "weekly",
@@ -48,6 +76,143 @@ SLA = {
 
 SOURCES = ["orders", "payments", "products"]
 
+# Optional JSON file replacing the rules above (e.g. synthetic load-test sources)
+SLA_CONFIG_PATH = os.environ.get("SLA_CONFIG_PATH")
+if SLA_CONFIG_PATH:
+    with open(SLA_CONFIG_PATH) as f:
+        SLA = json.load(f)
+    SOURCES = list(SLA)
+
+# ETag -> max content timestamp, kept across warm invocations
+# (first level; CONTENT_STATE_KEY carries it across cold starts)
+_CONTENT_TS_CACHE = {}
+
+
+# ---------------- STORAGE ----------------
+
+class S3Storage:
+    def __init__(self, bucket):
+        self.bucket = bucket
+        self.client = boto3.client("s3")
+
+    def iter_objects(self, prefix, start_after=None):
+        paginator = self.client.get_paginator("list_objects_v2")
+        kwargs = {"Bucket": self.bucket, "Prefix": prefix}
+        if start_after:
+            kwargs["StartAfter"] = start_after
+        for page in paginator.paginate(**kwargs):
+            yield from page.get("Contents", [])
+
+    def read_range(self, key, byte_range):
+        resp = self.client.get_object(Bucket=self.bucket, Key=key, Range=f"bytes={byte_range}")
+        return resp["Body"].read()
+
+    def get_bytes(self, key):
+        try:
+            resp = self.client.get_object(Bucket=self.bucket, Key=key)
+        except self.client.exceptions.NoSuchKey:
+            return None
+        return resp["Body"].read()
+
+    def put_bytes(self, key, body, content_type="application/octet-stream"):
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=body, ContentType=content_type)
+
+    def get_json(self, key):
+        body = self.get_bytes(key)
+        return json.loads(body) if body is not None else None
+
+    def put_json(self, key, obj):
+        self.put_bytes(key, json.dumps(obj), "application/json")
+
+
+class LocalStorage:
+    """
+    Local directory tree laid out like the bucket (key == relative path).
+
+    Listing walks directories with os.scandir in sorted order, so keys come
+    out in the same lexicographic order as S3 and each partition directory
+    is one contiguous run. With `start_after`, directories whose keys all
+    sort before the cursor are skipped without being opened. LastModified
+    is the file mtime.
+    """
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+
+    def _path(self, key):
+        return os.path.join(self.root, *key.split("/"))
+
+    def _walk(self, path, key_prefix, start_after=None):
+        try:
+            # a directory sorts as "<name>/", the way its keys sort in S3
+            entries = sorted(os.scandir(path), key=lambda e: e.name + "/" if e.is_dir() else e.name)
+        except FileNotFoundError:
+            return
+        for entry in entries:
+            key = f"{key_prefix}{entry.name}"
+            if entry.is_dir():
+                dir_key = key + "/"
+                if start_after and dir_key < start_after and not start_after.startswith(dir_key):
+                    continue
+                yield from self._walk(entry.path, dir_key, start_after)
+            elif entry.is_file():
+                if start_after and key <= start_after:
+                    continue
+                st = entry.stat()
+                yield {
+                    "Key": key,
+                    "LastModified": datetime.fromtimestamp(st.st_mtime, timezone.utc),
+                    "Size": st.st_size,
+                    "ETag": f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+                }
+
+    def iter_objects(self, prefix, start_after=None):
+        # Walk only the deepest directory fully named by the prefix
+        base = prefix.rsplit("/", 1)[0] + "/" if "/" in prefix else ""
+        for obj in self._walk(self._path(base) if base else self.root, base, start_after):
+            if obj["Key"].startswith(prefix):
+                yield obj
+
+    def read_range(self, key, byte_range):
+        start, end = byte_range.split("-")
+        with open(self._path(key), "rb") as f:
+            if not start:
+                f.seek(0, os.SEEK_END)
+                f.seek(max(0, f.tell() - int(end)))
+                return f.read()
+            f.seek(int(start))
+            return f.read(int(end) - int(start) + 1)
+
+    def get_bytes(self, key):
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put_bytes(self, key, body, content_type=None):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(body.encode() if isinstance(body, str) else body)
+
+    def get_json(self, key):
+        body = self.get_bytes(key)
+        return json.loads(body) if body is not None else None
+
+    def put_json(self, key, obj):
+        self.put_bytes(key, json.dumps(obj))
+
+
+def make_storage(bucket, local_root):
+    if STORAGE_BACKEND == "local":
+        return LocalStorage(local_root)
+    return S3Storage(bucket)
+
+
+raw_store = make_storage(RAW_BUCKET, LOCAL_RAW_ROOT)
+results_store = make_storage(RESULTS_BUCKET, LOCAL_RESULTS_ROOT)
+
 
 # ---------------- HELPERS ----------------
 
@@ -55,19 +220,167 @@ def utc_now():
     return datetime.now(timezone.utc)
 
 
-def list_latest_object(bucket, prefix):
-    paginator = s3.get_paginator("list_objects_v2")
-    latest = None
+def partition_of(key):
+    return key.rsplit("/", 1)[0]
 
-    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
-        for obj in page.get("Contents", []):
-            if latest is None or obj["LastModified"] > latest["LastModified"]:
-                latest = obj
 
-    if latest is None:
-        return None, None
+def list_latest_object(store, prefix, cursor=None, arrivals=None, now=None,
+                       logged_since=None, full=False):
+    """
+    Newest object under `prefix` plus the volume of its partition.
 
-    return latest["LastModified"], latest["Key"]
+    Both backends list keys in lexicographic order, so each partition (key
+    directory) arrives as one contiguous run. Only the running totals of the
+    current partition are kept; they are saved when that run ends if it
+    holds the newest object.
+
+    With a `cursor` (dict, updated in place) the listing resumes at the
+    start of the newest partition of the previous run, so files rewritten
+    in place there (e.g. a snapshot) are seen again. Objects with a key past
+    the previous run's last key, or newer than its newest object, are
+    appended to `arrivals`.
+
+    Keys that land or are rewritten before that partition (late partitions,
+    backfills) are found by the full listing done every FULL_RELIST_HOURS:
+    it logs every object new or modified since the previous full listing,
+    minus the (key, epoch LastModified) pairs `logged_since(previous full
+    listing time)` says were already logged. A run without a usable cursor
+    only seeds it and logs nothing, so existing history is never replayed
+    into one segment.
+    """
+    now = now or utc_now()
+    latest = None
+    latest_partition = None
+    volume = None
+
+    cur_partition = None
+    cur_bytes = 0
+    cur_objects = 0
+
+    seeding = not (cursor and cursor.get("prefix") == prefix and "full_listing_at" in cursor)
+    start_after = None
+    logged = set()
+    if not seeding:
+        prev_key = cursor["start_after"]
+        prev_time = datetime.fromisoformat(cursor["latest_time"])
+        last_full = datetime.fromisoformat(cursor["full_listing_at"])
+        full = full or now - last_full >= timedelta(hours=FULL_RELIST_HOURS)
+        if full:
+            since = last_full
+            if arrivals is not None and logged_since:
+                logged = logged_since(last_full)
+        else:
+            # "<partition>" sorts just before "<partition>/<file>"
+            start_after = cursor["latest_partition"]
+            since = prev_time
+
+    last_key = None
+    for obj in store.iter_objects(prefix, start_after):
+        partition = partition_of(obj["Key"])
+        if partition != cur_partition:
+            if cur_partition is not None and cur_partition == latest_partition:
+                volume = {"partition": cur_partition, "bytes": cur_bytes, "objects": cur_objects}
+            cur_partition, cur_bytes, cur_objects = partition, 0, 0
+
+        cur_bytes += obj.get("Size", 0)
+        cur_objects += 1
+
+        if latest is None or obj["LastModified"] > latest["LastModified"]:
+            latest = obj
+            latest_partition = partition
+
+        last_key = obj["Key"]
+        if (
+            arrivals is not None and not seeding
+            and (obj["Key"] > prev_key or obj["LastModified"] > since)
+            and (obj["Key"], int(obj["LastModified"].timestamp())) not in logged
+        ):
+            arrivals.append(obj)
+
+    if latest is None:
+        if start_after is not None:
+            # newest partition removed since the last run: list everything
+            return list_latest_object(store, prefix, cursor, arrivals, now, logged_since, full=True)
+        return None, None, None, None
+
+    if cur_partition == latest_partition:
+        volume = {"partition": cur_partition, "bytes": cur_bytes, "objects": cur_objects}
+
+    if cursor is not None:
+        full_listing_at = last_full if start_after is not None else now
+        cursor.clear()
+        cursor.update({
+            "prefix": prefix,
+            "start_after": last_key,
+            "latest_time": latest["LastModified"].isoformat(),
+            "latest_partition": latest_partition,
+            "full_listing_at": full_listing_at.isoformat()
+        })
+
+    return latest["LastModified"], latest["Key"], latest.get("ETag"), volume
+
+
+def parse_content_ts(value):
+    value = value.strip().strip('"')
+    if not value:
+        return None
+    try:
+        ts = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.astimezone(timezone.utc)
+
+
+def read_range(store, key, byte_range):
+    return store.read_range(key, byte_range).decode("utf-8", errors="replace")
+
+
+def probe_content_time(store, key, etag, column, saved=None):
+    """
+    Max value of `column` in the tail of a CSV object.
+
+    Reads the header line and the last CONTENT_PROBE_TAIL_BYTES with ranged
+    GETs, so the object is never downloaded in full. Results are cached by
+    ETag, in process and in `saved` (the source's {"etag", "max_ts"} entry
+    of the persisted probe state); an unchanged object is not read again.
+    Unreadable objects (empty, InvalidRange, AccessDenied, ...) give None
+    and are not cached, so the probe never fails the run.
+    """
+    if etag and etag in _CONTENT_TS_CACHE:
+        return _CONTENT_TS_CACHE[etag]
+    if etag and saved and saved.get("etag") == etag:
+        max_ts = datetime.fromisoformat(saved["max_ts"]) if saved["max_ts"] else None
+        _CONTENT_TS_CACHE[etag] = max_ts
+        return max_ts
+
+    try:
+        head = read_range(store, key, f"0-{CONTENT_PROBE_HEAD_BYTES - 1}")
+        header = next(csv.reader([head.splitlines()[0]])) if head.strip() else []
+        if column not in header:
+            return None
+        col_idx = header.index(column)
+
+        tail = read_range(store, key, f"-{CONTENT_PROBE_TAIL_BYTES}")
+    except (ClientError, OSError) as e:
+        print(f"content probe skipped for {key}: {e}")
+        return None
+
+    # First line is either partial (cut by the range) or the header itself
+    lines = tail.splitlines()[1:]
+
+    max_ts = None
+    for row in csv.reader(lines):
+        if len(row) <= col_idx:
+            continue
+        ts = parse_content_ts(row[col_idx])
+        if ts and (max_ts is None or ts > max_ts):
+            max_ts = ts
+
+    if etag:
+        _CONTENT_TS_CACHE[etag] = max_ts
+    return max_ts
 
 
 def expected_time_for_source(source, check_time_utc):
@@ -110,6 +423,32 @@ def expected_time_for_source(source, check_time_utc):
     return check_time_utc
 
 
+def partition_expected_time(source, key):
+    """Expected arrival of the partition `key` belongs to (None if the key has no date)."""
+    cfg = SLA[source]
+    day = re.search(r"/(\d{4}-\d{2}-\d{2})/", key)
+    if day is None:
+        return None
+    feed_date = datetime.strptime(day.group(1), "%Y-%m-%d")
+
+    if cfg["type"] == "hourly":
+        hour = re.search(r"/hour=(\d{2})/", key)
+        if hour is None:
+            return None
+        start = feed_date.replace(hour=int(hour.group(1)), tzinfo=timezone.utc)
+        return start + timedelta(minutes=cfg["expected_within_min"])
+
+    if cfg["type"] == "daily":
+        expected_local = feed_date.replace(
+            hour=cfg["expected_hour_local"],
+            minute=cfg["expected_minute_local"],
+            tzinfo=ET
+        )
+        return expected_local.astimezone(timezone.utc)
+
+    return None
+
+
 def compute_status_delay_score(source, latest_time_utc, check_time_utc):
     cfg = SLA[source]
 
@@ -161,15 +500,88 @@ def put_result(source, result, check_time_utc):
         f"day={check_time_utc:%d}/"
         f"hour={check_time_utc:%H}/sla_result.json"
     )
-    s3.put_object(
-        Bucket=RESULTS_BUCKET,
-        Key=key,
-        Body=json.dumps(result),
-        ContentType="application/json"
-    )
+    results_store.put_json(key, result)
     return key
 
 
+def load_volume_state():
+    return results_store.get_json(VOLUME_STATE_KEY) or {}
+
+
+def save_volume_state(state):
+    results_store.put_json(VOLUME_STATE_KEY, state)
+
+
+def load_content_state():
+    return results_store.get_json(CONTENT_STATE_KEY) or {}
+
+
+def save_content_state(state):
+    results_store.put_json(CONTENT_STATE_KEY, state)
+
+
+def baseline_update(stats, x):
+    """
+    Welford mean/variance for the first VOLUME_WINDOW samples, then an
+    exponentially weighted version of the same update (weight 1/window),
+    so the baseline follows level shifts instead of averaging all history.
+    """
+    n, mean, var = stats
+    n += 1
+    w = 1 / min(n, VOLUME_WINDOW)
+    delta = x - mean
+    mean += w * delta
+    var = (1 - w) * (var + w * delta * delta)
+    return [n, mean, var]
+
+
+def volume_baseline_slot(source, partition):
+    # expected hour (ET) of the partition, so late files stay in their own slot
+    expected = partition_expected_time(source, partition + "/")
+    return f"{expected.astimezone(ET):%H}" if expected else "any"
+
+
+def evaluate_volume(source, volume, state):
+    """
+    Compare the newest partition's byte count with the rolling baseline for
+    this source and the partition's expected hour (ET).
+
+    The newest partition may still be filling, so it is re-scored on every
+    run and only folded into the baseline, with its final size, once a
+    newer partition has appeared. `state` is updated in place.
+    """
+    if volume is None:
+        return "missing"
+
+    src_state = state.get(source)
+    if not src_state or "baseline" not in src_state:  # new source or pre-rolling state layout
+        src_state = state[source] = {"open": None, "baseline": {}}
+    open_part = src_state["open"]
+    if open_part and open_part["partition"] != volume["partition"]:
+        slot = src_state["baseline"].get(open_part["slot"], [0, 0.0, 0.0])
+        src_state["baseline"][open_part["slot"]] = baseline_update(slot, open_part["bytes"])
+
+    slot_key = volume_baseline_slot(source, volume["partition"])
+    src_state["open"] = {"partition": volume["partition"], "bytes": volume["bytes"], "slot": slot_key}
+
+    n, mean, var = src_state["baseline"].get(slot_key, [0, 0.0, 0.0])
+    if n < VOLUME_MIN_SAMPLES:
+        return "insufficient_history"
+
+    std = var ** 0.5
+    if std > 0:
+        z = (volume["bytes"] - mean) / std
+    else:
+        # flat baseline: any change at all is a deviation
+        z = 0.0 if volume["bytes"] == mean else float("inf") * (1 if volume["bytes"] > mean else -1)
+
+    if z > VOLUME_Z_THRESHOLD:
+        return "high_volume"
+    if z < -VOLUME_Z_THRESHOLD:
+        return "low_volume"
+    return "normal"
+
+
 def send_sns_alert(critical_results):
     if not SNS_TOPIC_ARN:
         return
@@ -193,16 +605,53 @@ def send_sns_alert(critical_results):
 def lambda_handler(event, context):
     check_time = utc_now()
     results = []
+    volume_state = load_volume_state()
+    content_state = load_content_state() if CONTENT_PROBE_ENABLED else None
+    cursors = (results_store.get_json(CURSOR_STATE_KEY) or {}) if INCREMENTAL_LISTING else None
 
     for source in SOURCES:
-        latest_time, latest_key = list_latest_object(
-            RAW_BUCKET, f"staging/{source}/"
+        cursor = cursors.setdefault(source, {}) if INCREMENTAL_LISTING else None
+        arrivals = [] if INCREMENTAL_LISTING else None
+        latest_time, latest_key, latest_etag, volume = list_latest_object(
+            raw_store, f"{RAW_PREFIX}/{source}/", cursor, arrivals, check_time,
+            lambda since: logged_since(results_store, source, since)
         )
 
+        # ARRIVAL LOG (incremental listing only)
+        if arrivals:
+            for a in arrivals:
+                expected_at = partition_expected_time(source, a["Key"])
+                a["delay_min"] = (
+                    int((a["LastModified"] - expected_at).total_seconds() // 60)
+                    if expected_at else None
+                )
+            append_arrivals(results_store, source, check_time, arrivals)
+
         status, delay, score, expected = compute_status_delay_score(
             source, latest_time, check_time
         )
 
+        # CONTENT FRESHNESS (optional)
+        data_time = None
+        ts_column = SLA[source].get("content_ts_column")
+        if CONTENT_PROBE_ENABLED and ts_column and latest_key:
+            data_time = probe_content_time(
+                raw_store, latest_key, latest_etag, ts_column, content_state.get(source)
+            )
+            if latest_etag in _CONTENT_TS_CACHE:
+                # keep only the newest object per source
+                content_state[source] = {
+                    "etag": latest_etag,
+                    "max_ts": data_time.isoformat() if data_time else None
+                }
+        data_lag = (
+            int((check_time - data_time).total_seconds() // 60)
+            if data_time else None
+        )
+
+        # VOLUME
+        volume_status = evaluate_volume(source, volume, volume_state)
+
         result = {
             "source": source,
             "check_time_utc": check_time.isoformat(),
@@ -214,12 +663,25 @@ def lambda_handler(event, context):
             "latest_object_key": latest_key,
             "status": status,
             "delay_minutes": delay,
-            "freshness_score": score
+            "arrival_delay_minutes": delay,
+            "latest_data_time_utc": data_time.isoformat() if data_time else None,
+            "data_lag_minutes": data_lag,
+            "freshness_score": score,
+            "partition_bytes": volume["bytes"] if volume else None,
+            "partition_objects": volume["objects"] if volume else None,
+            "volume_status": volume_status,
+            "new_objects": len(arrivals) if arrivals is not None else None
         }
 
         result["written_to"] = put_result(source, result, check_time)
         results.append(result)
 
+    save_volume_state(volume_state)
+    if CONTENT_PROBE_ENABLED:
+        save_content_state(content_state)
+    if INCREMENTAL_LISTING:
+        results_store.put_json(CURSOR_STATE_KEY, cursors)
+
     critical = [r for r in results if r["status"] == "critically_late"]
     if critical:
         send_sns_alert(critical)
@@ -228,3 +690,8 @@ def lambda_handler(event, context):
         "statusCode": 200,
         "body": json.dumps(results, indent=2)
     }
+
+
+if __name__ == "__main__":
+    # e.g. STORAGE_BACKEND=local RAW_PREFIX=staging_feeds python sla-freshness-checker.py
+    print(lambda_handler({}, None)["body"])
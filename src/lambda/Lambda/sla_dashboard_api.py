@@ -1,13 +1,84 @@
+import gzip
 import json
 import os
+import re
 import time
 import boto3
+from datetime import date, datetime, timedelta, timezone
 
-athena = boto3.client("athena")
+from lateness_sketch import lateness_percentiles
+
+# "athena" (default) or "local" for the in-process pandas engine (sla_local_queries.py)
+QUERY_BACKEND = os.environ.get("QUERY_BACKEND", "athena")
+
+athena = boto3.client("athena") if QUERY_BACKEND == "athena" else None
+s3 = boto3.client("s3") if QUERY_BACKEND == "athena" else None
 
 ATHENA_DB = os.environ.get("ATHENA_DB", "sla_db")
 ATHENA_OUTPUT_S3 = os.environ.get("ATHENA_OUTPUT_S3", "")  # must be s3://bucket/prefix/
 
+# Daily lateness sketches (scripts/build_lateness_sketches.py)
+SKETCH_BUCKET = os.environ.get("SKETCH_BUCKET", "de-sla-results-sirisha-01")
+SKETCH_KEY = os.environ.get("SKETCH_KEY", "sketches/lateness_daily.json.gz")
+
+# ETag + decoded sketches, kept across warm invocations
+_SKETCH_CACHE = {}
+
+# Latest status only scans this many hour partitions of sla_results
+# (overridable per request with `status_hours`, up to STATUS_MAX_HOURS)
+LATEST_LOOKBACK_HOURS = int(os.environ.get("LATEST_LOOKBACK_HOURS", "6"))
+STATUS_MAX_HOURS = int(os.environ.get("STATUS_MAX_HOURS", "168"))
+
+GRANULARITIES = ("day", "week", "month")
+SOURCE_RE = re.compile(r"^[a-z0-9_]+$")
+
+if QUERY_BACKEND == "local":
+    import sla_local_queries as local_queries
+
+def parse_query_params(event) -> dict:
+    """
+    Validate API query parameters: source, status_hours, from, to (YYYY-MM-DD),
+    granularity. from/to only window the business trend and lateness; pipeline
+    status always looks back status_hours from now. Raises ValueError on bad input.
+    """
+    qs = (event or {}).get("queryStringParameters") or {}
+
+    source = qs.get("source") or None
+    if source and not SOURCE_RE.match(source):
+        raise ValueError(f"invalid source: {source}")
+
+    status_hours = qs.get("status_hours") or str(LATEST_LOOKBACK_HOURS)
+    if not status_hours.isdigit() or not 1 <= int(status_hours) <= STATUS_MAX_HOURS:
+        raise ValueError(f"status_hours must be between 1 and {STATUS_MAX_HOURS}")
+
+    start = date.fromisoformat(qs["from"]) if qs.get("from") else None
+    end = date.fromisoformat(qs["to"]) if qs.get("to") else None
+    if start and end and start > end:
+        raise ValueError("'from' must not be after 'to'")
+
+    granularity = qs.get("granularity") or "day"
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of {', '.join(GRANULARITIES)}")
+
+    return {
+        "source": source,
+        "status_hours": int(status_hours),
+        "start": start,
+        "end": end,
+        "granularity": granularity,
+    }
+
+def hour_partition_filter(end: datetime, hours: int) -> str:
+    """sla_results partition predicate for the `hours` hour partitions up to `end`."""
+    end = end.replace(minute=0, second=0, microsecond=0)
+    clauses = []
+    for i in range(hours):
+        t = end - timedelta(hours=i)
+        clauses.append(
+            f"(year = '{t:%Y}' AND month = '{t:%m}' AND day = '{t:%d}' AND hour = '{t:%H}')"
+        )
+    return "(" + " OR ".join(clauses) + ")"
+
 def run_athena_query(sql: str) -> str:
     """Start Athena query and return QueryExecutionId."""
     resp = athena.start_query_execution(
@@ -72,11 +143,36 @@ def fetch_all_rows(qid: str) -> list[dict]:
 
     return rows_out
 
-def get_pipeline_sla_latest():
-    # Your existing view: sla_latest_status
-    sql = """
-    SELECT *
-    FROM sla_latest_status
+def get_pipeline_sla_latest(source=None, hours=LATEST_LOOKBACK_HOURS):
+    """
+    Latest status per source. Scans only the last `hours` hour partitions.
+    The checker writes every source on each run, so an empty window means it
+    stalled: the last STATUS_MAX_HOURS are scanned instead, so the dashboard
+    shows the last known (stale) status rather than nothing.
+    """
+    if QUERY_BACKEND == "local":
+        return local_queries.get_pipeline_sla_latest(source, hours, STATUS_MAX_HOURS)
+
+    rows = query_latest_status(source, hours)
+    if not rows and hours < STATUS_MAX_HOURS:
+        rows = query_latest_status(source, STATUS_MAX_HOURS)
+    return rows
+
+def query_latest_status(source, hours):
+    partitions = hour_partition_filter(datetime.now(timezone.utc), hours)
+
+    source_filter = f"AND source = '{source}'" if source else ""
+
+    sql = f"""
+    WITH ranked AS (
+      SELECT source, status, freshness_score, latest_object_key, check_time_utc,
+             ROW_NUMBER() OVER (PARTITION BY source ORDER BY check_time_utc DESC) rn
+      FROM sla_results
+      WHERE {partitions} {source_filter}
+    )
+    SELECT source, status, freshness_score, latest_object_key, check_time_utc
+    FROM ranked
+    WHERE rn = 1
     ORDER BY source;
     """
     qid = run_athena_query(sql)
@@ -84,6 +180,9 @@ def get_pipeline_sla_latest():
     return fetch_all_rows(qid)
 
 def get_business_kpi():
+    if QUERY_BACKEND == "local":
+        return local_queries.get_business_kpi()
+
     sql = """
     SELECT *
     FROM orders_business_sla_kpi;
@@ -98,6 +197,9 @@ def get_business_kpi():
     return rows[0]
 
 def get_business_trend_90d():
+    if QUERY_BACKEND == "local":
+        return local_queries.get_business_trend_90d()
+
     sql = """
     SELECT *
     FROM orders_business_sla_trend_90d
@@ -107,15 +209,85 @@ def get_business_trend_90d():
     wait_for_query(qid)
     return fetch_all_rows(qid)
 
+def get_business_trend(start=None, end=None, granularity="day"):
+    """Business SLA trend over [start, end], bucketed by day/week/month."""
+    if QUERY_BACKEND == "local":
+        return local_queries.get_business_trend(start, end, granularity)
+
+    filters = ["1 = 1"]
+    if start:
+        filters.append(f"delivered_day >= DATE '{start.isoformat()}'")
+    if end:
+        filters.append(f"delivered_day <= DATE '{end.isoformat()}'")
+
+    sql = f"""
+    SELECT
+      date_trunc('{granularity}', delivered_day) delivered_day,
+      SUM(total_delivered) total_delivered,
+      SUM(late_orders) late_orders,
+      ROUND(1E2 * SUM(late_orders) / SUM(total_delivered), 2) late_percentage
+    FROM orders_business_sla_daily
+    WHERE {" AND ".join(filters)}
+    GROUP BY 1
+    ORDER BY 1;
+    """
+    qid = run_athena_query(sql)
+    wait_for_query(qid)
+    return fetch_all_rows(qid)
+
+def load_lateness_sketches() -> dict:
+    """Sketch file from S3, re-downloaded only when its ETag changes."""
+    try:
+        head = s3.head_object(Bucket=SKETCH_BUCKET, Key=SKETCH_KEY)
+    except s3.exceptions.ClientError:
+        return {}
+
+    if _SKETCH_CACHE.get("etag") != head["ETag"]:
+        body = s3.get_object(Bucket=SKETCH_BUCKET, Key=SKETCH_KEY)["Body"].read()
+        _SKETCH_CACHE["store"] = json.loads(gzip.decompress(body))
+        _SKETCH_CACHE["etag"] = head["ETag"]
+    return _SKETCH_CACHE["store"]
+
+def get_business_lateness(start=None, end=None):
+    """p50/p90/p99 days late over [start, end], merged from daily sketches."""
+    if QUERY_BACKEND == "local":
+        store = local_queries.load_lateness_sketches()
+    else:
+        store = load_lateness_sketches()
+    if not store:
+        return {}
+    return lateness_percentiles(store, start, end)
+
 def lambda_handler(event, context):
     try:
-        pipeline_sla = get_pipeline_sla_latest()
+        params = parse_query_params(event)
+    except ValueError as e:
+        return {
+            "statusCode": 400,
+            "headers": {
+                "Content-Type": "application/json",
+                "Access-Control-Allow-Origin": "*",
+            },
+            "body": json.dumps({"error": str(e)}),
+        }
+
+    try:
+        pipeline_sla = get_pipeline_sla_latest(params["source"], params["status_hours"])
         business_kpi = get_business_kpi()
-        business_trend_90d = get_business_trend_90d()
+        business_lateness = get_business_lateness(params["start"], params["end"])
+
+        # Key name kept for the dashboard; holds the requested window if one is given
+        if params["start"] or params["end"] or params["granularity"] != "day":
+            business_trend_90d = get_business_trend(
+                params["start"], params["end"], params["granularity"]
+            )
+        else:
+            business_trend_90d = get_business_trend_90d()
 
         payload = {
             "pipeline_sla": pipeline_sla,
             "business_kpi": business_kpi,
+            "business_lateness": business_lateness,
             "business_trend_90d": business_trend_90d,
         }
 
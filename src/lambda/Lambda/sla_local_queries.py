@@ -0,0 +1,221 @@
+import glob
+import gzip
+import json
+import os
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+# Local copies of the Athena tables (bundled feeds or an `aws s3 sync` mirror)
+LOCAL_ORDERS_PATH = os.environ.get("LOCAL_ORDERS_PATH", "data/raw/feeds/orders")
+LOCAL_RESULTS_PATH = os.environ.get("LOCAL_RESULTS_PATH", "data/results/metrics")
+LOCAL_SKETCH_PATH = os.environ.get("LOCAL_SKETCH_PATH", "data/sketches/lateness_daily.json.gz")
+
+TS_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# path -> (file signature, table), kept across warm invocations
+_TABLE_CACHE = {}
+
+
+def _files(root: str, patterns: list[str]) -> list[str]:
+    if os.path.isfile(root):
+        return [root]
+    out = []
+    for pattern in patterns:
+        out.extend(glob.glob(os.path.join(root, "**", pattern), recursive=True))
+    return sorted(out)
+
+
+def _signature(files: list[str]) -> tuple:
+    """Changes whenever a file is added, removed or rewritten (e.g. by `aws s3 sync`)."""
+    out = []
+    for f in files:
+        st = os.stat(f)
+        out.append((f, st.st_mtime_ns, st.st_size))
+    return tuple(out)
+
+
+def _cached(path: str, sig: tuple):
+    entry = _TABLE_CACHE.get(path)
+    return entry[1] if entry and entry[0] == sig else None
+
+
+def _read_table(path: str) -> pd.DataFrame:
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    return pd.read_csv(path, dtype=str, keep_default_na=False)
+
+
+def _round2(s):
+    """ROUND(x, 2) as Athena does it (half away from zero, values are >= 0)."""
+    return np.floor(s * 100 + 0.5) / 100
+
+
+def _parse_ts(s: pd.Series) -> pd.Series:
+    """TRY(date_parse(NULLIF(trim(x), ''), '%Y-%m-%d %H:%i:%s'))"""
+    return pd.to_datetime(s.astype(str).str.strip(), format=TS_FORMAT, errors="coerce")
+
+
+def load_delivered_orders() -> pd.DataFrame:
+    """
+    Delivered orders with parsed delivered/estimated timestamps
+    (the `base` CTE of the business SLA views).
+    """
+    files = _files(LOCAL_ORDERS_PATH, ["*.csv", "*.parquet"])
+    sig = _signature(files)
+    cached = _cached(LOCAL_ORDERS_PATH, sig)
+    if cached is not None:
+        return cached
+
+    cols = ["order_status", "order_delivered_customer_date", "order_estimated_delivery_date"]
+    if files:
+        orders = pd.concat([_read_table(f)[cols] for f in files], ignore_index=True)
+    else:
+        orders = pd.DataFrame(columns=cols)
+
+    orders = orders[orders["order_status"] == "delivered"]
+    base = pd.DataFrame({
+        "delivered_ts": _parse_ts(orders["order_delivered_customer_date"]),
+        "estimated_ts": _parse_ts(orders["order_estimated_delivery_date"]),
+    })
+
+    _TABLE_CACHE[LOCAL_ORDERS_PATH] = (sig, base)
+    return base
+
+
+def _result_partition_dirs(lookback_hours: int) -> list[str]:
+    """
+    Hour partition directories of the results tree to read (same pruning the
+    Athena query gets from partition projection).
+    """
+    now = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    return [
+        f"year={t:%Y}/month={t:%m}/day={t:%d}/hour={t:%H}"
+        for t in (now - timedelta(hours=i) for i in range(lookback_hours))
+    ]
+
+
+def load_sla_results(source: str | None, partition_dirs: list[str]) -> pd.DataFrame:
+    """Checker result records (the `sla_results` table) in the given partitions."""
+    cols = ["source", "status", "freshness_score", "latest_object_key", "check_time_utc"]
+    source_dir = f"source={source}" if source else "source=*"
+    records = []
+    for part in partition_dirs:
+        pattern = os.path.join(LOCAL_RESULTS_PATH, source_dir, part, "**", "*.json")
+        for path in glob.glob(pattern, recursive=True):
+            with open(path) as f:
+                records.append(json.load(f))
+    return pd.DataFrame(records, columns=cols) if records else pd.DataFrame(columns=cols)
+
+
+def load_lateness_sketches() -> dict:
+    """Daily lateness sketches (see lateness_sketch.py), {} if not built yet."""
+    if not os.path.isfile(LOCAL_SKETCH_PATH):
+        return {}
+    sig = _signature([LOCAL_SKETCH_PATH])
+    cached = _cached(LOCAL_SKETCH_PATH, sig)
+    if cached is not None:
+        return cached
+
+    with gzip.open(LOCAL_SKETCH_PATH, "rt") as f:
+        store = json.load(f)
+    _TABLE_CACHE[LOCAL_SKETCH_PATH] = (sig, store)
+    return store
+
+
+def _late_stats(df: pd.DataFrame) -> pd.DataFrame:
+    both = df.dropna(subset=["delivered_ts", "estimated_ts"])
+    late = both["delivered_ts"] > both["estimated_ts"]
+    return both.assign(late=late.astype(int))
+
+
+def get_pipeline_sla_latest(source: str | None = None, lookback_hours: int = 6,
+                            max_hours: int | None = None) -> list[dict]:
+    """
+    Equivalent of the API's latest-status query over sla_results, including
+    its fallback to `max_hours` when the checker wrote nothing recently.
+    """
+    results = load_sla_results(source, _result_partition_dirs(lookback_hours))
+    if results.empty and max_hours and max_hours > lookback_hours:
+        results = load_sla_results(source, _result_partition_dirs(max_hours))
+    if results.empty:
+        return []
+    latest = (
+        results.sort_values("check_time_utc", ascending=False)
+        .drop_duplicates("source")
+        .sort_values("source")
+    )
+    return latest.to_dict(orient="records")
+
+
+def get_business_kpi() -> dict:
+    """Equivalent of `orders_business_sla_kpi`."""
+    df = _late_stats(load_delivered_orders())
+    if df.empty:
+        return {}
+
+    total = len(df)
+    late_orders = int(df["late"].sum())
+    late_rows = df[df["late"] == 1]
+    days_late = (late_rows["delivered_ts"] - late_rows["estimated_ts"]).dt.days
+
+    return {
+        "total_delivered": total,
+        "late_orders": late_orders,
+        "late_percentage": float(_round2(100.0 * late_orders / total)),
+        "avg_days_late": float(_round2(days_late.mean())) if len(days_late) else None,
+    }
+
+
+def get_business_trend_90d() -> list[dict]:
+    """Equivalent of `orders_business_sla_trend_90d ORDER BY delivered_day`."""
+    base = load_delivered_orders()
+    max_day = base["delivered_ts"].dropna().dt.normalize().max()
+    if pd.isna(max_day):
+        return []
+
+    df = _late_stats(base)
+    df = df.assign(delivered_day=df["delivered_ts"].dt.normalize())
+    df = df[df["delivered_day"] >= max_day - pd.Timedelta(days=90)]
+
+    trend = df.groupby("delivered_day").agg(
+        total_delivered=("late", "size"),
+        late_orders=("late", "sum"),
+    ).reset_index()
+    trend["late_percentage"] = _round2(100.0 * trend["late_orders"] / trend["total_delivered"])
+    trend["delivered_day"] = trend["delivered_day"].dt.strftime("%Y-%m-%d")
+
+    return trend.sort_values("delivered_day").to_dict(orient="records")
+
+
+def get_business_trend(start: date | None = None, end: date | None = None,
+                       granularity: str = "day") -> list[dict]:
+    """Equivalent of the API's trend query over `orders_business_sla_daily`."""
+    df = _late_stats(load_delivered_orders())
+    day = df["delivered_ts"].dt.normalize()
+    keep = pd.Series(True, index=df.index)
+    if start:
+        keep &= day >= pd.Timestamp(start)
+    if end:
+        keep &= day <= pd.Timestamp(end)
+    df, day = df[keep], day[keep]
+    if df.empty:
+        return []
+
+    # date_trunc: weeks start on Monday
+    if granularity == "week":
+        period = day - pd.to_timedelta(day.dt.weekday, unit="D")
+    elif granularity == "month":
+        period = day - pd.to_timedelta(day.dt.day - 1, unit="D")
+    else:
+        period = day
+
+    trend = df.assign(delivered_day=period).groupby("delivered_day").agg(
+        total_delivered=("late", "size"),
+        late_orders=("late", "sum"),
+    ).reset_index()
+    trend["late_percentage"] = _round2(100.0 * trend["late_orders"] / trend["total_delivered"])
+    trend["delivered_day"] = trend["delivered_day"].dt.strftime("%Y-%m-%d")
+
+    return trend.sort_values("delivered_day").to_dict(orient="records")
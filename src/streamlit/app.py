@@ -1,8 +1,12 @@
 import streamlit as st
 import requests
 import pandas as pd
+import hashlib
 import json
 import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from urllib.parse import urlencode
 
 st.set_page_config("SLA Dashboard", layout="wide")
 st.title("📊 SLA Freshness Dashboard")
@@ -15,38 +19,158 @@ api_url = st.text_input(
 auto = st.checkbox("Auto refresh", value=True)
 interval = st.number_input("Refresh seconds", 30, 300, 60)
 
-def load_data():
-    r = requests.get(api_url, timeout=10)
-    data = r.json()
+# Default is the API's fixed 90-day trend; a custom range is sent as from/to/granularity
+custom_range = st.checkbox("Custom trend range")
+params = {}
+if custom_range:
+    r1, r2, r3 = st.columns(3)
+    trend_from = r1.date_input("From", date(2017, 1, 1))
+    trend_to = r2.date_input("To", date(2018, 8, 31))
+    granularity = r3.selectbox("Granularity", ["day", "week", "month"])
+    params = {"from": trend_from.isoformat(), "to": trend_to.isoformat(), "granularity": granularity}
+
+request_url = f"{api_url}?{urlencode(params)}" if params else api_url
+
+TREND_MAX_POINTS = 300
+
+
+# ---------------- DATA LAYER ----------------
+
+def fetch_raw(url):
+    r = requests.get(url, timeout=10)
+    r.raise_for_status()
+    raw = r.content
+    return hashlib.sha256(raw).hexdigest(), raw
+
+
+@st.cache_resource
+def get_fetcher(url):
+    # one background worker + last good response per API URL, shared across reruns
+    return {
+        "executor": ThreadPoolExecutor(max_workers=1),
+        "future": None,
+        "latest": None,
+        "fetched_at": 0.0,
+        "error": None,
+    }
+
+
+def poll_fetcher(fetcher, url, force, refresh_sec=None):
+    # collect a finished fetch, then start a new one if forced or stale
+    fut = fetcher["future"]
+    if fut is not None and fut.done():
+        try:
+            fetcher["latest"] = fut.result()
+            fetcher["error"] = None
+        except Exception as e:
+            fetcher["error"] = str(e)
+        fetcher["future"] = None
+        fetcher["fetched_at"] = time.time()
+
+    stale = refresh_sec is not None and time.time() - fetcher["fetched_at"] >= refresh_sec
+    if fetcher["future"] is None and (force or stale):
+        fetcher["future"] = fetcher["executor"].submit(fetch_raw, url)
+
+
+@st.cache_data(ttl=3600, max_entries=16)
+def decode_payload(content_hash, _raw):
+    # keyed by content hash only: an unchanged response is never re-decoded
+    data = json.loads(_raw)
     if isinstance(data, dict) and "body" in data:
         data = json.loads(data["body"])
-    return data
-
-if st.button("Load SLA Data") or auto:
-    data = load_data()
 
     pipeline = pd.DataFrame(data["pipeline_sla"])
     kpi = data["business_kpi"]
     trend = pd.DataFrame(data["business_trend_90d"])
+    if not trend.empty:
+        trend["late_percentage"] = pd.to_numeric(trend["late_percentage"], errors="coerce")
+        trend = downsample_lttb(trend.sort_values("delivered_day"), "late_percentage", TREND_MAX_POINTS)
+    return pipeline, kpi, trend
 
-    critical = pipeline[pipeline["status"] == "critically_late"]
 
+def downsample_lttb(df, y_col, max_points):
+    """Largest-Triangle-Three-Buckets: keep max_points rows that preserve the line's shape."""
+    n = len(df)
+    if n <= max_points or max_points < 3:
+        return df
+
+    y = df[y_col].fillna(0).tolist()
+    keep = [0]
+    bucket = (n - 2) / (max_points - 2)
+
+    a = 0
+    for i in range(max_points - 2):
+        start = int(i * bucket) + 1
+        end = int((i + 1) * bucket) + 1
+        next_end = min(int((i + 2) * bucket) + 1, n)
+
+        # average point of the next bucket
+        avg_x = (end + next_end - 1) / 2
+        avg_y = sum(y[end:next_end]) / (next_end - end)
+
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((a - avg_x) * (y[j] - y[a]) - (a - j) * (avg_y - y[a]))
+            if area > best_area:
+                best, best_area = j, area
+        keep.append(best)
+        a = best
+
+    keep.append(n - 1)
+    return df.iloc[keep]
+
+
+# ---------------- UI ----------------
+
+fetcher = get_fetcher(request_url)
+poll_fetcher(fetcher, request_url, st.button("Load SLA Data"), interval if auto else None)
+
+if fetcher["error"]:
+    st.warning(f"Last refresh failed: {fetcher['error']}")
+
+if fetcher["latest"] is None:
+    if fetcher["future"] is not None:
+        st.info("Loading SLA data…")
+        time.sleep(0.5)
+        st.rerun()
+    if auto:
+        time.sleep(interval)
+        st.rerun()
+    st.stop()
+
+pipeline, kpi, trend = decode_payload(*fetcher["latest"])
+
+if not pipeline.empty:
+    critical = pipeline[pipeline["status"] == "critically_late"]
     if not critical.empty:
         st.error(f"🚨 ALERT: {len(critical)} source(s) critically late")
 
-    st.subheader("Layer 1 — Pipeline SLA")
+st.subheader("Layer 1 — Pipeline SLA")
+if pipeline.empty:
+    st.info("No pipeline SLA results yet.")
+else:
     st.dataframe(pipeline, use_container_width=True)
 
-    st.subheader("Layer 2 — Business SLA (KPI)")
+st.subheader("Layer 2 — Business SLA (KPI)")
+if not kpi:
+    st.info("No delivered orders to report.")
+else:
     c1, c2, c3, c4 = st.columns(4)
     c1.metric("Delivered", kpi["total_delivered"])
     c2.metric("Late Orders", kpi["late_orders"])
     c3.metric("Late %", kpi["late_percentage"])
     c4.metric("Avg Days Late", kpi["avg_days_late"])
 
-    st.subheader("Business SLA Trend (90 Days)")
+st.subheader("Business SLA Trend" if custom_range else "Business SLA Trend (90 Days)")
+if trend.empty:
+    st.info("No delivered orders in this range.")
+else:
     st.line_chart(trend.set_index("delivered_day")["late_percentage"])
 
-    if auto:
-        time.sleep(interval)
-        st.rerun()
+if fetcher["future"] is not None:
+    # poll quickly while a fetch is in flight (also after a manual "Load SLA Data")
+    time.sleep(1)
+    st.rerun()
+elif auto:
+    time.sleep(interval)
+    st.rerun()
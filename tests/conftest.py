@@ -0,0 +1,31 @@
+import importlib.util
+import os
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+LAMBDA_DIR = os.path.join(REPO_ROOT, "src", "lambda", "Lambda")
+sys.path.insert(0, LAMBDA_DIR)
+
+
+@pytest.fixture(scope="session")
+def checker():
+    """sla-freshness-checker.py (hyphenated, so loaded by path) on the local backend."""
+    pytest.importorskip("boto3")
+    env = {"STORAGE_BACKEND": "local", "INCREMENTAL_LISTING": "true"}
+    old = {k: os.environ.get(k) for k in env}
+    os.environ.update(env)
+    try:
+        spec = importlib.util.spec_from_file_location(
+            "sla_freshness_checker", os.path.join(LAMBDA_DIR, "sla-freshness-checker.py")
+        )
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        for k, v in old.items():
+            if v is None:
+                os.environ.pop(k)
+            else:
+                os.environ[k] = v
+    return module
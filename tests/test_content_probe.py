@@ -0,0 +1,63 @@
+"""
+Content probe cache (CONTENT_PROBE_ENABLED=true): an unchanged object is not
+read again, even when the next run starts in a fresh container.
+"""
+import pytest
+
+SOURCE = "payments"
+HEADER = "order_id,order_purchase_timestamp\n"
+
+
+@pytest.fixture
+def run(checker, tmp_path, monkeypatch):
+    raw = checker.LocalStorage(str(tmp_path / "raw"))
+    reads = []
+    original_read_range = raw.read_range
+
+    def counting_read_range(key, byte_range):
+        reads.append(key)
+        return original_read_range(key, byte_range)
+
+    monkeypatch.setattr(raw, "read_range", counting_read_range)
+    monkeypatch.setattr(checker, "raw_store", raw)
+    monkeypatch.setattr(checker, "results_store", checker.LocalStorage(str(tmp_path / "results")))
+    monkeypatch.setattr(checker, "RAW_PREFIX", "feeds")
+    monkeypatch.setattr(checker, "SOURCES", [SOURCE])
+    monkeypatch.setattr(checker, "CONTENT_PROBE_ENABLED", True)
+    monkeypatch.setattr(checker, "INCREMENTAL_LISTING", False)
+    monkeypatch.setattr(checker, "_CONTENT_TS_CACHE", {})
+
+    def write(rows):
+        path = tmp_path / "raw" / "feeds" / SOURCE / "2026-01-01" / "hour=10" / "part.csv"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(HEADER + "".join(f"{i},{ts}\n" for i, ts in enumerate(rows)))
+
+    def check(cold_start=False):
+        if cold_start:
+            checker._CONTENT_TS_CACHE.clear()
+        reads.clear()
+        checker.lambda_handler({}, None)
+        result = checker.results_store.get_json(
+            next(o["Key"] for o in checker.results_store.iter_objects("metrics/"))
+        )
+        return result["latest_data_time_utc"], len(reads)
+
+    return write, check
+
+
+def test_unchanged_object_is_not_reread_after_cold_start(run):
+    write, check = run
+    write(["2026-01-01 09:00:00", "2026-01-01 09:45:00"])
+
+    assert check() == ("2026-01-01T09:45:00+00:00", 2)
+    assert check() == ("2026-01-01T09:45:00+00:00", 0)
+    assert check(cold_start=True) == ("2026-01-01T09:45:00+00:00", 0)
+
+
+def test_rewritten_object_is_probed_again(run):
+    write, check = run
+    write(["2026-01-01 09:00:00"])
+    check()
+
+    write(["2026-01-01 09:00:00", "2026-01-01 10:30:00"])
+    assert check(cold_start=True) == ("2026-01-01T10:30:00+00:00", 2)
@@ -0,0 +1,108 @@
+"""
+Incremental listing + arrival log (INCREMENTAL_LISTING=true) against the
+local storage backend: every object that lands or is rewritten must be
+logged exactly once, including late partitions that sort before the cursor.
+"""
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import arrival_history
+
+T0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+PREFIX = "feeds/payments/"
+
+
+class Feed:
+    """A raw tree, a results tree and one source's cursor, checked like lambda_handler does."""
+
+    def __init__(self, checker, tmp_path):
+        self.checker = checker
+        self.raw_root = tmp_path / "raw"
+        self.raw = checker.LocalStorage(str(self.raw_root))
+        self.results = checker.LocalStorage(str(tmp_path / "results"))
+        self.cursor = {}
+
+    def put(self, hour, name, at_hours, size=10):
+        path = self.raw_root / PREFIX / "2026-01-01" / f"hour={hour:02d}" / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"x" * size)
+        ts = (T0 + timedelta(hours=at_hours)).timestamp()
+        os.utime(path, (ts, ts))
+
+    def check(self, at_hours):
+        now = T0 + timedelta(hours=at_hours)
+        arrivals = []
+        latest = self.checker.list_latest_object(
+            self.raw, PREFIX, self.cursor, arrivals, now,
+            lambda since: arrival_history.logged_since(self.results, "payments", since),
+        )
+        arrival_history.append_arrivals(self.results, "payments", now, arrivals)
+        return latest, sorted(a["Key"].split("/", 3)[3] for a in arrivals)
+
+
+@pytest.fixture
+def feed(checker, tmp_path):
+    return Feed(checker, tmp_path)
+
+
+def test_first_run_seeds_cursor_without_logging(feed):
+    feed.put(7, "a.csv", 7.2)
+    feed.put(9, "a.csv", 9.2)
+    (_, key, _, _), arrivals = feed.check(9.5)
+    assert key.endswith("hour=09/a.csv")
+    assert arrivals == []
+    assert feed.check(10)[1] == []
+
+
+def test_late_partition_is_logged_by_full_relist(feed):
+    feed.put(7, "a.csv", 7.2)
+    feed.put(9, "a.csv", 9.2)
+    feed.check(9.5)  # seeds; full listing at 09:30
+
+    feed.put(8, "a.csv", 10.1)  # late, sorts before the cursor
+    feed.put(10, "a.csv", 10.2)
+    assert feed.check(10.5)[1] == ["hour=10/a.csv"]
+    assert feed.check(11.5)[1] == []
+
+    # next full listing (FULL_RELIST_HOURS after 09:30) backfills hour=08 once
+    assert feed.check(9.5 + 24)[1] == ["hour=08/a.csv"]
+    assert feed.check(10.5 + 24)[1] == []
+    assert feed.check(9.5 + 48)[1] == []
+
+
+def test_rewrite_of_older_partition_is_logged_by_full_relist(feed):
+    feed.put(7, "a.csv", 7.2)
+    feed.put(9, "a.csv", 9.2)
+    feed.check(9.5)
+
+    feed.put(7, "a.csv", 12, size=20)
+    assert feed.check(12.5)[1] == []
+    assert feed.check(9.5 + 24)[1] == ["hour=07/a.csv"]
+    assert feed.check(9.5 + 48)[1] == []
+
+
+def test_rewrite_in_newest_partition_is_logged_once(feed):
+    feed.put(9, "a.csv", 9.2)
+    feed.check(9.5)
+
+    feed.put(9, "a.csv", 11, size=30)
+    (latest_time, _, _, volume), arrivals = feed.check(11.5)
+    assert arrivals == ["hour=09/a.csv"]
+    assert latest_time == T0 + timedelta(hours=11)
+    assert volume["bytes"] == 30
+
+    assert feed.check(12.5)[1] == []
+    assert feed.check(9.5 + 24)[1] == []
+
+
+def test_removed_newest_partition_falls_back_to_full_listing(feed):
+    feed.put(7, "a.csv", 7.2)
+    feed.put(9, "a.csv", 9.2)
+    feed.check(9.5)
+
+    (feed.raw_root / PREFIX / "2026-01-01" / "hour=09" / "a.csv").unlink()
+    (_, key, _, _), arrivals = feed.check(10.5)
+    assert key.endswith("hour=07/a.csv")
+    assert arrivals == []
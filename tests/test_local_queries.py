@@ -0,0 +1,223 @@
+"""
+Parity checks: the pandas engine in sla_local_queries must return what the
+Athena views return on the bundled Olist orders feed (data/raw/feeds/orders).
+
+The reference below is a plain-Python transcription of the view SQL in
+athena/, row by row, so it does not share any code with the engine.
+"""
+import csv
+import glob
+import json
+import math
+import os
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+pytest.importorskip("pandas")
+
+import sla_local_queries as local_queries  # noqa: E402
+from lateness_sketch import lateness_percentiles, merge_sketches  # noqa: E402
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+ORDERS_PATH = os.path.join(REPO_ROOT, "data", "raw", "feeds", "orders")
+
+SKETCH_PATH = os.path.join(REPO_ROOT, "data", "sketches", "lateness_daily.json.gz")
+
+
+@pytest.fixture(autouse=True)
+def bundled_orders(monkeypatch):
+    monkeypatch.setattr(local_queries, "LOCAL_ORDERS_PATH", ORDERS_PATH)
+
+
+# ---------------- reference: the view SQL ----------------
+
+def _parse(value):
+    # TRY(date_parse(NULLIF(trim(BOTH FROM x), ''), '%Y-%m-%d %H:%i:%s'))
+    try:
+        return datetime.strptime(value.strip(), "%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        return None
+
+
+def _round2(x):
+    # ROUND(x, 2): half away from zero
+    return math.floor(x * 100 + 0.5) / 100
+
+
+def _base_rows():
+    rows = []
+    for path in sorted(glob.glob(os.path.join(ORDERS_PATH, "**", "*.csv"), recursive=True)):
+        with open(path, newline="") as f:
+            for r in csv.DictReader(f):
+                if r["order_status"] != "delivered":
+                    continue
+                rows.append((_parse(r["order_delivered_customer_date"]),
+                             _parse(r["order_estimated_delivery_date"])))
+    return rows
+
+
+@pytest.fixture(scope="module")
+def base():
+    return _base_rows()
+
+
+def _daily(base):
+    """orders_business_sla_daily"""
+    days = {}
+    for d, e in base:
+        if d is None or e is None:
+            continue
+        total, late = days.get(d.date(), (0, 0))
+        days[d.date()] = (total + 1, late + (d > e))
+    return days
+
+
+def _trend_rows(days):
+    return [
+        {"delivered_day": day.isoformat(), "total_delivered": total,
+         "late_orders": late, "late_percentage": _round2(100.0 * late / total)}
+        for day, (total, late) in sorted(days.items())
+    ]
+
+
+def reference_kpi(base):
+    both = [(d, e) for d, e in base if d is not None and e is not None]
+    late_days = [(d - e).days for d, e in both if d > e]
+    return {
+        "total_delivered": len(both),
+        "late_orders": len(late_days),
+        "late_percentage": _round2(100.0 * len(late_days) / len(both)),
+        "avg_days_late": _round2(sum(late_days) / len(late_days)),
+    }
+
+
+def reference_trend_90d(base):
+    max_day = max(d.date() for d, _ in base if d is not None)
+    days = _daily(base)
+    return _trend_rows({k: v for k, v in days.items() if k >= max_day - timedelta(days=90)})
+
+
+def reference_trend(base, start, end, granularity):
+    periods = {}
+    for day, (total, late) in _daily(base).items():
+        if not start <= day <= end:
+            continue
+        if granularity == "week":
+            day -= timedelta(days=day.weekday())
+        elif granularity == "month":
+            day = day.replace(day=1)
+        t, l = periods.get(day, (0, 0))
+        periods[day] = (t + total, l + late)
+    return _trend_rows(periods)
+
+
+def _plain(rows):
+    return [{k: (v.item() if hasattr(v, "item") else v) for k, v in r.items()} for r in rows]
+
+
+# ---------------- tests ----------------
+
+def test_business_kpi_matches_view(base):
+    kpi = local_queries.get_business_kpi()
+    assert kpi == reference_kpi(base)
+    assert kpi == {
+        "total_delivered": 96470,
+        "late_orders": 7826,
+        "late_percentage": 8.11,
+        "avg_days_late": 8.87,
+    }
+
+
+def test_business_trend_90d_matches_view(base):
+    trend = _plain(local_queries.get_business_trend_90d())
+    assert trend == reference_trend_90d(base)
+    assert len(trend) == 64
+    assert trend[0] == {"delivered_day": "2018-07-19", "total_delivered": 10,
+                        "late_orders": 1, "late_percentage": 10.0}
+    assert trend[-1] == {"delivered_day": "2018-10-17", "total_delivered": 1,
+                         "late_orders": 1, "late_percentage": 100.0}
+
+
+@pytest.mark.parametrize("granularity", ["day", "week", "month"])
+def test_business_trend_matches_daily_view(base, granularity):
+    start, end = date(2018, 1, 1), date(2018, 3, 31)
+    trend = _plain(local_queries.get_business_trend(start, end, granularity))
+    assert trend == reference_trend(base, start, end, granularity)
+
+
+def test_business_trend_by_month():
+    trend = local_queries.get_business_trend(date(2018, 1, 1), date(2018, 3, 31), "month")
+    assert [(r["delivered_day"], r["total_delivered"], r["late_orders"], r["late_percentage"])
+            for r in _plain(trend)] == [
+        ("2018-01-01", 6597, 667, 10.11),
+        ("2018-02-01", 5850, 384, 6.56),
+        ("2018-03-01", 6824, 1080, 15.83),
+    ]
+
+
+def test_orders_cache_follows_file_changes(tmp_path, monkeypatch):
+    header = "order_status,order_delivered_customer_date,order_estimated_delivery_date\n"
+    feed = tmp_path / "orders.csv"
+    feed.write_text(header + "delivered,2018-01-05 10:00:00,2018-01-03 00:00:00\n")
+    monkeypatch.setattr(local_queries, "LOCAL_ORDERS_PATH", str(tmp_path))
+
+    assert local_queries.get_business_kpi()["total_delivered"] == 1
+    assert local_queries.get_business_kpi()["total_delivered"] == 1
+
+    (tmp_path / "more.csv").write_text(header + "delivered,2018-01-06 10:00:00,2018-01-09 00:00:00\n")
+    kpi = local_queries.get_business_kpi()
+    assert (kpi["total_delivered"], kpi["late_orders"]) == (2, 1)
+
+
+def _write_result(root, source, check_time, status):
+    part = root / f"source={source}" / f"year={check_time:%Y}" / f"month={check_time:%m}" \
+        / f"day={check_time:%d}" / f"hour={check_time:%H}"
+    part.mkdir(parents=True, exist_ok=True)
+    (part / f"{check_time:%H%M%S}.json").write_text(json.dumps({
+        "source": source, "status": status, "freshness_score": 100,
+        "latest_object_key": "k", "check_time_utc": check_time.isoformat(),
+    }))
+
+
+def test_pipeline_status_falls_back_when_checker_stalled(tmp_path, monkeypatch):
+    monkeypatch.setattr(local_queries, "LOCAL_RESULTS_PATH", str(tmp_path))
+    now = datetime.now(timezone.utc)
+    _write_result(tmp_path, "orders", now - timedelta(hours=30), "late")
+    _write_result(tmp_path, "orders", now - timedelta(hours=20), "on_time")
+
+    assert local_queries.get_pipeline_sla_latest(None, 6) == []
+    rows = local_queries.get_pipeline_sla_latest(None, 6, 168)
+    assert [(r["source"], r["status"]) for r in rows] == [("orders", "on_time")]
+
+    _write_result(tmp_path, "orders", now, "critically_late")
+    rows = local_queries.get_pipeline_sla_latest(None, 6, 168)
+    assert [(r["source"], r["status"]) for r in rows] == [("orders", "critically_late")]
+
+
+def _nearest_rank(values, q):
+    values = sorted(values)
+    return values[max(1, math.ceil(q * len(values))) - 1]
+
+
+def test_lateness_sketch_matches_avg_days_late_population(base, monkeypatch):
+    monkeypatch.setattr(local_queries, "LOCAL_SKETCH_PATH", SKETCH_PATH)
+    store = local_queries.load_lateness_sketches()
+
+    hist = merge_sketches(store["days"].values())
+    assert min(hist) >= 0
+    assert sum(hist.values()) == reference_kpi(base)["late_orders"]
+    assert _round2(sum(b * n for b, n in hist.items()) / sum(hist.values())) == \
+        reference_kpi(base)["avg_days_late"]
+
+    start, end = date(2018, 1, 1), date(2018, 3, 31)
+    late_days = [
+        (d - e).days for d, e in base
+        if d is not None and e is not None and d > e and start <= d.date() <= end
+    ]
+    assert lateness_percentiles(store, start, end) == {
+        "late_orders": len(late_days),
+        "p50_days_late": _nearest_rank(late_days, 0.5),
+        "p90_days_late": _nearest_rank(late_days, 0.9),
+        "p99_days_late": _nearest_rank(late_days, 0.99),
+    }